@@ -15,8 +15,7 @@ def test(session):
 
 @nox.session
 def lint(session):
-    session.install(".")
-    session.install("-r", "lint-requirements.txt")
+    session.install(".", "-r", "lint-requirements.txt")
     session.run("black", "src/moreos", "test/", "noxfile.py")
     session.run("flake8", "src/moreos", "test")
     session.run("pylint", "src/moreos", "test")
@@ -37,8 +36,7 @@ def venv(session):
 
 @nox.session
 def sphinx(session):
-    session.install(".")
-    session.install("-r", "doc/source/requirements.txt")
+    session.install(".", "-r", "doc/source/requirements.txt")
     if not session.posargs:
         session.run("sphinx-quickstart", "--help")
         return
@@ -47,8 +45,7 @@ def sphinx(session):
 
 @nox.session
 def docs(session):
-    session.install(".")
-    session.install("-r", "doc/source/requirements.txt")
+    session.install(".", "-r", "doc/source/requirements.txt")
     session.run("doc8", "doc/source/")
     session.run(
         "sphinx-build",
@@ -1,13 +1,23 @@
 """Declare the interface we expect other adapters to have."""
-import zope.interface
+import sys
 
 from moreos import _common_types as _ct
 
+if sys.version_info >= (3, 8):
+    from typing import Protocol, runtime_checkable
+else:
+    from typing_extensions import Protocol, runtime_checkable
 
-class IRequest(zope.interface.Interface):
-    """Interface for interacting with an HTTP Client's Request."""
 
-    def uri(request: _ct.HttpRequest) -> str:  # noqa: N805
+@runtime_checkable
+class IRequest(Protocol):
+    """Interface for interacting with an HTTP Client's Request.
+
+    Adapters don't need to inherit from this, they only need to provide
+    these methods.
+    """
+
+    def uri(self, request: _ct.HttpRequest) -> str:
         """Retrieve the URI for the request.
 
         :returns:
@@ -15,4 +25,3 @@ class IRequest(zope.interface.Interface):
         :rtype:
             str
         """
-        pass
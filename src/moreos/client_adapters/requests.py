@@ -1,16 +1,7 @@
-"""Declare the Requests client interface and register it."""
+"""Declare the client adapter for the Requests library."""
 import typing
 
-import zope.interface
-import zope.interface.verify
 
-if typing.TYPE_CHECKING:
-    import requests
-
-from . import interface
-
-
-@zope.interface.implementer(interface.IRequest)
 class Requests:
     """ClientAdapter used with the Requests library."""
 
@@ -19,5 +10,5 @@ class Requests:
         request: typing.Any,
     ) -> str:
         """Retrieve the URL of a PreparedRequest from Requests."""
-        request = typing.cast("requests.PreparedRequest", request)
-        return typing.cast("str", request.url)
+        url: str = request.url
+        return url
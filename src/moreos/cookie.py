@@ -1,56 +1,50 @@
 """The cookie module contains the parsing logic and cookie class."""
 import datetime
+import email.utils
 import enum
 import typing
 
 import attr
-import dateutil.parser
 
 from moreos import parsing
 
 
-SSP = typing.TypeVar("SSP", bound="SameSitePolicy")
-
-
 @enum.unique
-class SameSitePolicy(enum.Enum):
+class SameSitePolicy(str, enum.Enum):
     """A way of enumerating the values of the SameSite portion of a cookie."""
 
     lax = "Lax"
     strict = "Strict"
     none = "None"
 
-    def __str__(self: SSP) -> str:
+    def __str__(self: "SameSitePolicy") -> str:
         """Return the value of the enum instead of a repr."""
-        return str(self.value)
+        return str.__str__(self)
 
     @classmethod
     def from_value(
-        cls: typing.Type[SSP],
+        cls: typing.Type["SameSitePolicy"],
         policy: typing.Union[typing.Optional[str], "SameSitePolicy"],
-    ) -> typing.Optional[SSP]:
+    ) -> typing.Optional["SameSitePolicy"]:
         """Convert value to a SameSitePolicy value."""
-        if isinstance(policy, cls):
+        if isinstance(policy, SameSitePolicy):
             return policy
-        policy = typing.cast(typing.Optional[str], policy)
         return cls.from_string(policy)
 
     @classmethod
     def from_string(
-        cls: typing.Type[SSP], policy: typing.Optional[str]
-    ) -> typing.Optional[SSP]:
+        cls: typing.Type["SameSitePolicy"], policy: typing.Optional[str]
+    ) -> typing.Optional["SameSitePolicy"]:
         """Convert a string from a cookie to the SameSitePolicy value."""
         # NOTE(sigmavirus24): With a default of None, attrs will pass that to
         # the converter
         if policy is None:
             return policy
-        return typing.cast(
-            typing.Optional[SSP], getattr(cls, policy.lower(), None)
-        )
+        return _SSP_TABLE.get(policy.lower())
 
 
 @enum.unique
-class CookieType(enum.Enum):
+class CookieType(str, enum.Enum):
     """Enumeration of kinds of cookie headers."""
 
     server = "Set-Cookie"
@@ -58,7 +52,7 @@ class CookieType(enum.Enum):
 
     def __str__(self: "CookieType") -> str:
         """Return the value of the enum instead of a repr."""
-        return str(self.value)
+        return str.__str__(self)
 
     @classmethod
     def from_value(
@@ -66,11 +60,8 @@ class CookieType(enum.Enum):
         cookie_header_type: typing.Union[typing.Optional[str], "CookieType"],
     ) -> typing.Optional["CookieType"]:
         """Convert the cookie header name to its CookieType."""
-        if isinstance(cookie_header_type, cls):
+        if isinstance(cookie_header_type, CookieType):
             return cookie_header_type
-        cookie_header_type = typing.cast(
-            typing.Optional[str], cookie_header_type
-        )
         return cls.from_string(cookie_header_type)
 
     @classmethod
@@ -79,13 +70,20 @@ class CookieType(enum.Enum):
         cookie_header_value: typing.Optional[str],
     ) -> typing.Optional["CookieType"]:
         """Convert the cookie header name to its CookieType."""
-        if cookie_header_value is not None:
-            lowered = cookie_header_value.lower()
-            if lowered == "set-cookie":
-                return cls.server
-            if lowered == "cookie":
-                return cls.client
-        return None
+        if cookie_header_value is None:
+            return None
+        return _CT_TABLE.get(cookie_header_value.lower())
+
+
+_SSP_TABLE: typing.Dict[str, SameSitePolicy] = {
+    "lax": SameSitePolicy.lax,
+    "strict": SameSitePolicy.strict,
+    "none": SameSitePolicy.none,
+}
+_CT_TABLE: typing.Dict[str, CookieType] = {
+    "set-cookie": CookieType.server,
+    "cookie": CookieType.client,
+}
 
 
 # MyPy's attrs plugin doesn't support classmethods as converters below, so
@@ -113,22 +111,39 @@ def _max_age_converter(
     return datetime.timedelta(seconds=value)
 
 
+_RFC1123_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+
 def _expires_converter(
     value: typing.Union[None, str, datetime.datetime],
 ) -> typing.Optional[datetime.datetime]:
     if value is None or isinstance(value, datetime.datetime):
         return value
-    return dateutil.parser.parse(value)
+    # Our parser only accepts rfc1123-date values for
+    # Expires so we don't need a general purpose date parser here.
+    try:
+        return email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # Prior to Python 3.10 this raised TypeError on invalid input
+        return datetime.datetime.strptime(
+            value, _RFC1123_DATE_FORMAT
+        ).replace(tzinfo=datetime.timezone.utc)
 
 
 def _now() -> datetime.datetime:
     return datetime.datetime.now(tz=datetime.timezone.utc)
 
 
+def _lower_domain(cookie: "Cookie") -> typing.Optional[str]:
+    if cookie.domain is None:
+        return None
+    return cookie.domain.lower()
+
+
 C = typing.TypeVar("C", bound="Cookie")
 
 
-@attr.s(frozen=True)
+@attr.s(frozen=True, slots=True, hash=True, cache_hash=True)
 class Cookie:
     """A cookie string parsed into its components."""
 
@@ -154,7 +169,9 @@ class Cookie:
     max_age: typing.Optional[datetime.timedelta] = attr.ib(
         default=None, converter=_max_age_converter
     )
-    extensions: typing.Dict[str, str] = attr.ib(factory=dict)
+    # dicts aren't hashable so extensions only take part
+    # in equality checks
+    extensions: typing.Dict[str, str] = attr.ib(factory=dict, hash=False)
     # NOTE(sigmavirus24): We don't want this to play apart in being compared.
     # Someone _can_ create a Cookie instance from the keywords and we'd want
     # that to be equal to one parsed by us where we store the raw string
@@ -169,6 +186,15 @@ class Cookie:
     _received_at: datetime.datetime = attr.ib(
         init=False, eq=False, order=False, repr=False, factory=_now
     )
+    #: The lower-cased domain, computed once for domain matching since
+    #: domains are compared case-insensitively.
+    domain_lower: typing.Optional[str] = attr.ib(
+        init=False,
+        eq=False,
+        order=False,
+        repr=False,
+        default=attr.Factory(_lower_domain, takes_self=True),
+    )
 
     @property
     def domain_provided(self: C) -> bool:
@@ -181,6 +207,21 @@ class Cookie:
         """
         return self.domain is not None and not self.domain.endswith(".")
 
+    def expiry(self: C) -> typing.Optional[datetime.datetime]:
+        """Determine when the cookie expires.
+
+        :returns:
+            When the cookie expires or ``None`` if it's a session cookie.
+        :rtype:
+            :class:`~datetime.datetime`
+        """
+        if self.max_age is not None:
+            # As explained in
+            # https://tools.ietf.org/html/rfc6265#section-4.1.2.2
+            # Max-Age takes precedence if a cookie has it and expires
+            return self._received_at + self.max_age
+        return self.expires
+
     def expired(
         self: C, now: typing.Optional[datetime.datetime] = None
     ) -> bool:
@@ -192,31 +233,61 @@ class Cookie:
         :type now:
             :class:`~datetime.datetime`
         """
+        expiry = self.expiry()
+        if expiry is None:
+            return False
         if now is None:
             now = _now()
-        if self.max_age is not None:
-            # As explained in
-            # https://tools.ietf.org/html/rfc6265#section-4.1.2.2
-            # Max-Age takes precedence if a cookie has it and expires
-            return (self._received_at + self.max_age) < now
-        if self.expires is not None:
-            return self.expires < now
-        return False
-
-
-_expected_cookie_attributes = frozenset(
-    [
-        "name",
-        "value",
-        "httponly",
-        "secure",
-        "domain",
-        "samesite",
-        "path",
-        "expires",
-        "max_age",
-    ]
-)
+        return expiry < now
+
+
+# Maps the attribute names in a Set-Cookie header to the Cookie attribute
+# they populate and the pattern their value must match
+_attribute_value_patterns: typing.Dict[
+    str, typing.Tuple[str, typing.Pattern[str]]
+] = {
+    "Expires": ("expires", parsing.ABNF.expires_value_re),
+    "Max-Age": ("max_age", parsing.ABNF.max_age_value_re),
+    "Domain": ("domain", parsing.ABNF.domain_value_re),
+    "Path": ("path", parsing.ABNF.path_value_re),
+    "SameSite": ("samesite", parsing.ABNF.samesite_value_re),
+}
+_attribute_flags = {"Secure": "secure", "HttpOnly": "httponly"}
+
+
+def _parse_cookie_attributes(
+    cookie_avs: str,
+) -> typing.Tuple[typing.Dict[str, typing.Any], typing.Dict[str, str]]:
+    """Split the attributes following a cookie-pair into their parts.
+
+    Returns the keyword arguments for the known attributes and a mapping of
+    any extension attributes.
+    """
+    attributes: typing.Dict[str, typing.Any] = {}
+    extensions: typing.Dict[str, str] = {}
+    # As in https://tools.ietf.org/html/rfc6265#section-5.2 attributes are
+    # separated by ";" with optional whitespace around them. Anything before
+    # the first ";" is left over from the cookie-pair and isn't an attribute.
+    for cookie_av in cookie_avs.split(";")[1:]:
+        cookie_av = cookie_av.strip()
+        if not cookie_av or parsing.ABNF.control_characters_re.search(
+            cookie_av
+        ):
+            continue
+        if cookie_av in _attribute_flags:
+            attributes[_attribute_flags[cookie_av]] = True
+            continue
+        av_name, _, av_value = cookie_av.partition("=")
+        av_name, av_value = av_name.rstrip(), av_value.lstrip()
+        if av_name in _attribute_value_patterns:
+            attribute, pattern = _attribute_value_patterns[av_name]
+            # Values that don't match the grammar for
+            # known attributes (e.g., Max-Age=0) are ignored
+            if pattern.fullmatch(av_value) is not None:
+                attributes[attribute] = av_value
+            continue
+        extensions[av_name] = av_value
+    return attributes, extensions
 
 
 def parse(
@@ -239,32 +310,25 @@ def parse(
             secure=True, domain="", samesite=None, path="/", expires=None,
             max_age=None)]
     """
-    cookie_type = CookieType.from_string(cookie_header_type)
-    if cookie_type is CookieType.server:
-        m = parsing.ABNF.set_cookie_string_re.match(cookie_string)
+    header_type = cookie_header_type.lower()
+    if header_type == "set-cookie":
+        m = parsing.ABNF.cookie_pair_re.match(cookie_string)
         if m is None:
             return []
-        c = m.groupdict()
-        extensions = {
-            k: v for k, v in c.items() if k not in _expected_cookie_attributes
-        }
+        attributes, extensions = _parse_cookie_attributes(
+            cookie_string[m.end() :]
+        )
         return [
             Cookie(
-                c["name"],
-                c["value"],
-                httponly=(c["httponly"] == "HttpOnly"),
-                secure=(c["secure"] == "Secure"),
-                domain=c["domain"],
-                samesite=c["samesite"],
-                path=c["path"],
-                expires=c["expires"],
-                max_age=c["max_age"],
+                m.group("name"),
+                m.group("value"),
                 extensions=extensions,
                 raw=cookie_string,
-                type=cookie_type,
+                type=CookieType.server,
+                **attributes,
             )
         ]
-    if cookie_type is CookieType.client:
+    if header_type == "cookie":
         cookies = []
         for m in parsing.ABNF.client_cookie_string_re.finditer(cookie_string):
             cookie_name, cookie_value = m.groups()
@@ -274,7 +338,7 @@ def parse(
                     cookie_name,
                     cookie_value,
                     raw=raw,
-                    type=cookie_type,
+                    type=CookieType.client,
                 )
             )
         return cookies
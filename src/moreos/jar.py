@@ -1,4 +1,5 @@
 """Cookie jar logic for the moreos package."""
+import functools
 import typing
 import urllib.parse
 
@@ -15,14 +16,23 @@ if typing.TYPE_CHECKING:
 
 _RI = typing.TypeVar("_RI", bound="_RequestInfo")
 
+# Clients tend to make many requests to the same few
+# URIs. ParseResult is an immutable namedtuple so sharing the results across
+# jars is safe.
+_parse_uri = functools.lru_cache(maxsize=1024)(urllib.parse.urlparse)
 
-@attr.s
+# mypy only accepts concrete classes for instance_of
+# even though IRequest is a runtime_checkable Protocol
+_IRequest: typing.Type[typing.Any] = moreos.client_adapters.interface.IRequest
+
+
+@attr.s(slots=True)
 class _RequestInfo:
     uri: str = attr.ib()
     parsed_uri: urllib.parse.ParseResult = attr.ib(init=False)
 
     def __attrs_post_init__(self: _RI) -> None:
-        self.parsed_uri = urllib.parse.urlparse(self.uri)
+        self.parsed_uri = _parse_uri(self.uri)
 
     def absolute_uri(self: _RI) -> str:
         """Alias uri for use with RFC 2965 language."""
@@ -48,7 +58,7 @@ class _RequestInfo:
         hostname = self.hostname()
         if hostname is None:
             return None
-        if hostname.find(".") >= 0:
+        if "." in hostname:
             return hostname
         return f"{hostname}.local"
 
@@ -70,15 +80,18 @@ class _RequestInfo:
 J = typing.TypeVar("J", bound="Jar[typing.Any]")
 
 
+# attrs can't create a slotted subclass of typing.Generic
+# on Python 3.6
 @attr.s(frozen=True)
 class Jar(typing.Generic[_ct.HttpRequest]):
     """A Cookie jar to store cookies received by clients."""
 
     #: The adapter that retrieves values from the requests for a given HTTP
-    #: library
+    #: library. Its conformance to the interface is only verified when
+    #: Python isn't running with optimizations (``-O``) enabled.
     client_adapter: moreos.client_adapters.interface.IRequest = attr.ib(
-        validator=attr.validators.provides(
-            moreos.client_adapters.interface.IRequest
+        validator=(
+            attr.validators.instance_of(_IRequest) if __debug__ else None
         )
     )
     #: The backend used to store cookies. Can be configured by the user.
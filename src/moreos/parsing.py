@@ -4,7 +4,7 @@ import re
 import attr
 
 
-@attr.s(frozen=True)
+@attr.s(frozen=True, slots=True)
 class ABNF:
     """Container of regular expressions both raw and compiled for parsing."""
 
@@ -48,7 +48,8 @@ class ABNF:
     domain_value = subdomain
     domain_av = f"Domain=(?P<domain>{domain_value})"
     non_zero_digit = "1-9"
-    max_age_av = f"Max-Age=(?P<max_age>[{non_zero_digit}][{digit}]*)"
+    max_age_value = f"[{non_zero_digit}][{digit}]*"
+    max_age_av = f"Max-Age=(?P<max_age>{max_age_value})"
     sane_cookie_date = rfc1123_date
     expires_av = f"Expires=(?P<expires>{sane_cookie_date})"
     samesite_value = "(?:Strict|Lax|None)"
@@ -67,5 +68,13 @@ class ABNF:
     control_characters_re = re.compile(f"[{ctl}]+")
     cookie_name_re = token_re = re.compile(token)
     cookie_value_re = re.compile(cookie_value)
+    cookie_pair_re = re.compile(cookie_pair)
+    path_value_re = re.compile(path_value)
+    domain_value_re = re.compile(domain_value)
+    max_age_value_re = re.compile(max_age_value)
+    expires_value_re = re.compile(sane_cookie_date)
+    samesite_value_re = re.compile(samesite_value)
+    # cookie.parse matches the cookie-pair and each attribute separately but
+    # this is still available to anyone using the full grammar
     set_cookie_string_re = re.compile(set_cookie_string)
     client_cookie_string_re = re.compile(client_cookie_string)
@@ -1,12 +1,17 @@
 """Policies for managing cookie jars."""
 import enum
+import functools
 import ipaddress
+import pkgutil
 import typing
 
 import attr
 
 from moreos import _common_types as _ct
-from moreos import cookie as _cookie
+from moreos import exceptions
+
+if typing.TYPE_CHECKING:
+    from moreos import cookie as _cookie
 
 
 class DomainMatching(enum.IntFlag):
@@ -19,8 +24,10 @@ class DomainMatching(enum.IntFlag):
       host is an IP Address
 
     * ``reject_wellknown_public_suffixes_as_domain`` refuses to match or
-      accept a Domain attribute with a well-known suffix, e,g., com, co.uk,
-      etc.
+      accept a Domain attribute that is a public suffix, e,g., com, co.uk,
+      github.io, etc., according to the `Public Suffix List`_
+
+    .. _Public Suffix List: https://publicsuffix.org/
     """
 
     #: Strict equality matching will ensure that
@@ -30,94 +37,259 @@ class DomainMatching(enum.IntFlag):
     # next - 8
 
 
-@attr.s(frozen=True)
+# A trie of domain labels stored in reverse order, e.g., "example.com" is
+# stored as {"com": {"example": {".": True}}}
+_DomainTrie = typing.Dict[str, typing.Any]
+# Domain labels cannot contain a "." so it's safe to use as the marker for
+# the end of a domain in the trie
+_TRIE_TERMINAL = "."
+
+
+def _build_domain_trie(
+    domains: typing.Optional[typing.Iterable[str]],
+) -> typing.Optional[_DomainTrie]:
+    if domains is None:
+        return None
+    trie: _DomainTrie = {}
+    for domain in domains:
+        node = trie
+        # Entries may be written as ".example.com" or as
+        # fully-qualified names like "example.com." so ignore those dots
+        for label in reversed(domain.lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        node[_TRIE_TERMINAL] = True
+    return trie
+
+
+@functools.lru_cache(maxsize=1024)
+def _reversed_labels(host: str) -> typing.Tuple[str, ...]:
+    """Split host into its labels, starting from the top-level domain."""
+    return tuple(reversed(host.split(".")))
+
+
+def _domain_trie_match(
+    trie: _DomainTrie, reversed_labels: typing.Sequence[str]
+) -> bool:
+    """Check if a host is, or is a subdomain of, a domain in the trie.
+
+    The host is given as its labels in reverse, see :func:`_reversed_labels`
+    """
+    node = trie
+    for label in reversed_labels:
+        child: typing.Optional[_DomainTrie] = node.get(label)
+        if child is None:
+            return False
+        if _TRIE_TERMINAL in child:
+            return True
+        node = child
+    return False
+
+
+def _has_matching_flag(flag: DomainMatching) -> typing.Any:
+    """Compute whether a DomainPolicy's matching includes flag once."""
+    return attr.Factory(
+        lambda self: bool(self.matching & flag), takes_self=True
+    )
+
+
+@attr.s(frozen=True, slots=True)
 class DomainPolicy:
     """Configuration of the domain policy, as input to the Policy object.
 
     See also: https://tools.ietf.org/html/rfc6265#section-5.1.3
     """
 
+    #: Hosts for which cookies will never domain-match. Subdomains of these
+    #: hosts are also blocked.
     block_list: typing.Optional[typing.Sequence[str]] = attr.ib(default=None)
+    #: If provided, the only hosts (and their subdomains) for which cookies
+    #: may domain-match.
     allow_list: typing.Optional[typing.Sequence[str]] = attr.ib(default=None)
     matching: DomainMatching = attr.ib(
         default=DomainMatching.strict_equality
         | DomainMatching.reject_ipaddress
         | DomainMatching.reject_wellknown_public_suffixes_as_domain
     )
+    _block_trie: typing.Optional[_DomainTrie] = attr.ib(
+        init=False,
+        repr=False,
+        eq=False,
+        default=attr.Factory(
+            lambda self: _build_domain_trie(self.block_list), takes_self=True
+        ),
+    )
+    _allow_trie: typing.Optional[_DomainTrie] = attr.ib(
+        init=False,
+        repr=False,
+        eq=False,
+        default=attr.Factory(
+            lambda self: _build_domain_trie(self.allow_list), takes_self=True
+        ),
+    )
+    # Each IntFlag operation creates a new DomainMatching
+    # and the policy can't change, so check the flags once up front.
+    _strict_equality: bool = attr.ib(
+        init=False,
+        repr=False,
+        eq=False,
+        default=_has_matching_flag(DomainMatching.strict_equality),
+    )
+    _reject_ipaddress: bool = attr.ib(
+        init=False,
+        repr=False,
+        eq=False,
+        default=_has_matching_flag(DomainMatching.reject_ipaddress),
+    )
+    _reject_public_suffixes: bool = attr.ib(
+        init=False,
+        repr=False,
+        eq=False,
+        default=_has_matching_flag(
+            DomainMatching.reject_wellknown_public_suffixes_as_domain
+        ),
+    )
+
+    def _is_blocked(self: "DomainPolicy", request_host: str) -> bool:
+        """Check the request host against the block and allow lists."""
+        if self._block_trie is None and self._allow_trie is None:
+            return False
+        host_labels = _reversed_labels(request_host)
+        if self._block_trie is not None and _domain_trie_match(
+            self._block_trie, host_labels
+        ):
+            return True
+        return self._allow_trie is not None and not _domain_trie_match(
+            self._allow_trie, host_labels
+        )
 
     def match(
         self: "DomainPolicy", request_host: str, cookie_domain: str
     ) -> bool:
         """Check if the request_host and cookie_domain domain match.
 
+        :param str request_host:
+            The host the request is being made to.
+        :param str cookie_domain:
+            The cookie's domain, already lower-cased, e.g.,
+            :attr:`~moreos.cookie.Cookie.domain_lower`.
+
         References:
         * https://tools.ietf.org/html/rfc6265#section-5.1.3
         """
-        request_host, cookie_domain = (
-            request_host.lower(),
-            cookie_domain.lower(),
-        )
+        request_host = request_host.lower()
+
+        if self._is_blocked(request_host):
+            return False
 
         if request_host == cookie_domain:
             # In this case, they match exactly so that's perfect to return
             return True
 
-        if self.matching & DomainMatching.strict_equality:
+        if self._strict_equality:
             return False
 
-        if (
-            self.matching
-            & DomainMatching.reject_wellknown_public_suffixes_as_domain
-            and cookie_domain in _wellknown_public_suffixes
-        ):
-            return False
-
-        reject_ipaddress = self.matching & DomainMatching.reject_ipaddress
         if (
             request_host == ""
             or request_host[0] == "."
             or request_host[-1] == "."
-            or (_is_ipaddress(request_host) and reject_ipaddress)
         ):
             return False
 
-        index = request_host.index(cookie_domain)
-        if index <= 0 or not cookie_domain.startswith("."):
+        # We've already ruled out request hosts starting
+        # with a "." so this also ensures the request host is longer
+        if not cookie_domain.startswith(".") or not request_host.endswith(
+            cookie_domain
+        ):
             return False
 
         if (
-            cookie_domain == ""
-            or cookie_domain[1:] == ""
+            cookie_domain[1:] == ""
             or cookie_domain[1] == "."
             or cookie_domain[-1] == "."
-            or (_is_ipaddress(cookie_domain[1:]) and reject_ipaddress)
+        ):
+            return False
+
+        if self._reject_public_suffixes and _is_public_suffix(
+            cookie_domain[1:]
+        ):
+            return False
+
+        if self._reject_ipaddress and (
+            _is_ipaddress(request_host) or _is_ipaddress(cookie_domain[1:])
         ):
             return False
 
         return True
 
 
-_wellknown_public_suffixes = frozenset(
-    [
-        "com",
-        "org",
-        "edu",
-        "co",
-        "co.uk",
-        "io",
-        "net",
-        "int",
-        "gov",
-        "mil",
-        "ly",
-    ]
-)
+@functools.lru_cache(maxsize=None)
+def _public_suffix_trie() -> _DomainTrie:
+    """Load the bundled copy of the Public Suffix List into a domain trie.
+
+    Exception rules (e.g., ``!www.ck``) are stored with a terminal value of
+    ``False`` so they can override a wildcard rule (e.g., ``*.ck``).
+
+    The list is from https://publicsuffix.org/list/public_suffix_list.dat
+    """
+    data = pkgutil.get_data("moreos", "public_suffix_list.dat")
+    if data is None:
+        # Only possible with loaders that don't support get_data
+        raise exceptions.MoreosError(
+            "Unable to load the bundled Public Suffix List"
+        )
+    trie: _DomainTrie = {}
+    for line in data.decode("utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+        is_exception = line.startswith("!")
+        rule = line.lstrip("!")
+        try:
+            # Hosts we see will be IDNA encoded, so store those rules too
+            rules = {rule, rule.encode("idna").decode("ascii")}
+        except UnicodeError:
+            rules = {rule}
+        for rule in rules:
+            node = trie
+            for label in reversed(rule.split(".")):
+                node = node.setdefault(label, {})
+            node[_TRIE_TERMINAL] = not is_exception
+    return trie
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_public_suffix(domain: str) -> bool:
+    """Check if domain is itself a public suffix, e.g., co.uk."""
+    root = _public_suffix_trie()
+    labels = domain.split(".")
+    node = root
+    for label in reversed(labels[1:]):
+        child: typing.Optional[_DomainTrie] = node.get(label)
+        if child is None:
+            return False
+        node = child
+    rule = node.get(labels[0], {})
+    if _TRIE_TERMINAL in rule:
+        return bool(rule[_TRIE_TERMINAL])
+    if node.get("*", {}).get(_TRIE_TERMINAL, False):
+        return True
+    # The Public Suffix List's default rule is that any top-level domain is
+    # a public suffix
+    return node is root
 
 
+# The same hosts are checked over and over so remember the
+# results rather than having ipaddress parse (and raise for) them each time
+@functools.lru_cache(maxsize=1024)
 def _is_ipaddress(domain: str) -> bool:
     # ipaddress doesn't accept IPv6 hostnames like '[::1]' but requires
     # the IPv6 address alone.
     domain = domain.strip("[]")
+    # IPv6 addresses always contain a ":" and IPv4 addresses are only digits
+    # and dots, so most hostnames can be rejected without raising an
+    # exception from ipaddress
+    if ":" not in domain and not domain.replace(".", "").isdigit():
+        return False
     try:
         ipaddress.ip_address(domain)
     except ValueError:
@@ -130,6 +302,8 @@ def _is_ipaddress(domain: str) -> bool:
 P = typing.TypeVar("P", bound="Policy[typing.Any]")
 
 
+# attrs can't create a slotted subclass of typing.Generic
+# on Python 3.6
 @attr.s(frozen=True)
 class Policy(typing.Generic[_ct.HttpRequest]):
     """Logic that determines the behaviour of a cookie jar.
@@ -1,32 +1,42 @@
 """Storage mechanism for a cookie jar."""
 import collections
 import datetime
+import heapq
+import itertools
+import sys
 import typing
 
 import attr
-import zope.interface
 
 if typing.TYPE_CHECKING:
     import moreos.cookie
 
+if sys.version_info >= (3, 8):
+    from typing import Protocol
+else:
+    from typing_extensions import Protocol
+
 
 S = typing.TypeVar("S", bound="Storage")
 IM = typing.TypeVar("IM", bound="InMemory")
 
 
-class IBackend(zope.interface.Interface):
-    """Definition of the interface expected for a storage backend."""
+class IBackend(Protocol):
+    """Definition of the interface expected for a storage backend.
 
-    def save(
-        cookies: typing.Sequence["moreos.cookie.Cookie"],  # noqa: N805
-    ) -> None:
+    Backends don't need to inherit from this, they only need to provide
+    these methods.
+    """
+
+    def save(self, cookies: typing.Sequence["moreos.cookie.Cookie"]) -> None:
         """Save the cookies to the backend."""
 
     def list(
-        domain: typing.Optional[str] = None,  # noqa: N805
+        self,
+        domain: typing.Optional[str] = None,
         name: typing.Optional[str] = None,
         path: typing.Optional[str] = None,
-    ) -> typing.Sequence["moreos.cookie.Cookie"]:
+    ) -> typing.Iterator["moreos.cookie.Cookie"]:
         """List all stored cookies.
 
         :param str domain:
@@ -35,40 +45,70 @@ class IBackend(zope.interface.Interface):
             The name of the cookie to filter for.
         :param str path:
             The path associated with the cookie that's been stored.
+        :returns:
+            An iterator over the matching Cookie instances. The backend must
+            not be changed while iterating over it, so collect the cookies
+            into a list first if they're going to be saved or removed.
         """
 
-    def remove(cookie: "moreos.cookie.Cookie") -> None:  # noqa: N805
+    def remove(self, cookie: "moreos.cookie.Cookie") -> None:
         """Remove a cookie from the backend."""
 
-    def drop_for(domain: str) -> None:  # noqa: N805
+    def drop_for(self, domain: str) -> None:
         """Remove all cookies for a domain."""
 
+    def expired_before(
+        self, now: datetime.datetime
+    ) -> typing.Iterable["moreos.cookie.Cookie"]:
+        """Find the stored cookies that expired before now.
+
+        This must not remove anything. The cookies stay stored until they're
+        passed to :meth:`remove`.
 
-@zope.interface.implementer(IBackend)
-@attr.s
-class InMemory:
-    """In memory storage for cookies."""
+        :param now:
+            A timezone-aware datetime to compare the cookies' expiry to.
+        :type now:
+            :class:`~datetime.datetime`
+        """
 
-    _cookies: typing.MutableMapping[
-        str, typing.Set["moreos.cookie.Cookie"]
-    ] = attr.ib(factory=lambda: collections.defaultdict(set))
 
-    @staticmethod
-    def _key_for(cookie: "moreos.cookie.Cookie") -> str:
-        # TODO: Is this the best way to do this? Should we have nested
-        # mappings? Include the path?
-        return InMemory._key(cookie.domain or "", cookie.name)
+_CookiesByName = typing.MutableMapping[
+    str, typing.Set["moreos.cookie.Cookie"]
+]
 
-    @staticmethod
-    def _key(domain: str, name: str) -> str:
-        return f"{domain}::{name}"
+
+@attr.s(slots=True)
+class InMemory:
+    """In memory storage for cookies."""
+
+    # Cookies are bucketed by domain and then by name so
+    # finding or dropping the cookies for a domain doesn't need to look at
+    # every cookie we have stored.
+    _cookies: typing.MutableMapping[str, _CookiesByName] = attr.ib(
+        factory=lambda: collections.defaultdict(
+            lambda: collections.defaultdict(set)
+        )
+    )
+    # A min-heap of cookies with an expiry so purging
+    # doesn't need to check every cookie. Removed cookies are popped once
+    # they reach the top of the heap, or compacted away once they outnumber
+    # the stored cookies. The counter breaks ties so that Cookies
+    # themselves are never compared.
+    _expiry_heap: typing.List[
+        typing.Tuple[datetime.datetime, int, "moreos.cookie.Cookie"]
+    ] = attr.ib(factory=list, repr=False, eq=False)
+    _expiry_counter: typing.Iterator[int] = attr.ib(
+        factory=itertools.count, repr=False, eq=False
+    )
+    #: The number of stored cookies that have an entry in the expiry heap
+    _expiring: int = attr.ib(default=0, repr=False, eq=False)
 
     def list(
         self: IM,
         domain: typing.Optional[str] = None,
         name: typing.Optional[str] = None,
         path: typing.Optional[str] = None,
-    ) -> typing.Sequence["moreos.cookie.Cookie"]:
+    ) -> typing.Iterator["moreos.cookie.Cookie"]:
         """List all stored cookies.
 
         :param str domain:
@@ -77,61 +117,156 @@ class InMemory:
             The name of the cookie to filter for.
         :param str path:
             The path associated with the cookie that's been stored.
+        :returns:
+            An iterator over the matching Cookie instances. Don't save or
+            remove cookies until it has been consumed.
         """
-        if name is None:
-            name = ""
+        domains: typing.Iterable[_CookiesByName]
         if domain is not None:
-            pattern = self._key(domain, name)
-            return [
-                v
-                for k, vs in self._cookies.items()
-                if k.startswith(pattern)
-                for v in vs
-                if v.path == path
-            ]
-        return [v for vs in self._cookies.values() for v in vs]
+            domains = [self._cookies.get(domain, {})]
+        else:
+            domains = self._cookies.values()
+        for by_name in domains:
+            for cookie_name, cookies in by_name.items():
+                if name is not None and cookie_name != name:
+                    continue
+                for cookie in cookies:
+                    if path is None or cookie.path == path:
+                        yield cookie
 
     def save(
         self: IM, cookies: typing.Iterable["moreos.cookie.Cookie"]
     ) -> None:
         """Persist cookies to the in memory backend."""
         for cookie in cookies:
-            key = self._key_for(cookie)
-            self._cookies[key].add(cookie)
+            stored = self._cookies[cookie.domain or ""][cookie.name]
+            if cookie in stored:
+                # An equal cookie is already stored and set.add would keep it
+                continue
+            stored.add(cookie)
+            expiry = cookie.expiry()
+            if expiry is not None:
+                heapq.heappush(
+                    self._expiry_heap,
+                    (
+                        _as_aware(expiry),
+                        next(self._expiry_counter),
+                        cookie,
+                    ),
+                )
+                self._expiring += 1
 
     def remove(self: IM, cookie: "moreos.cookie.Cookie") -> None:
         """Remove a cookie from the in memory backend."""
-        key = self._key_for(cookie)
-        self._cookies[key].discard(cookie)
+        domain = cookie.domain or ""
+        by_name = self._cookies.get(domain)
+        if by_name is None:
+            return
+        stored = by_name.get(cookie.name)
+        if stored is None or cookie not in stored:
+            return
+        stored.discard(cookie)
+        # Don't keep empty buckets around for every name and domain we've seen
+        if not stored:
+            del by_name[cookie.name]
+            if not by_name:
+                del self._cookies[domain]
+        if cookie.expiry() is not None:
+            self._expiring -= 1
+            self._discard_stale_expiries()
 
     def drop_for(self: IM, domain: str) -> None:
         """Remove all cookies for a domain."""
-        pattern = self._key(domain, "")
-        for k in list(self._cookies.keys()):
-            if k.startswith(pattern):
-                del self._cookies[k]
-                break
+        by_name = self._cookies.pop(domain, None)
+        if by_name is None:
+            return
+        self._expiring -= sum(
+            1
+            for cookies in by_name.values()
+            for cookie in cookies
+            if cookie.expiry() is not None
+        )
+        self._discard_stale_expiries()
+
+    def expired_before(
+        self: IM, now: datetime.datetime
+    ) -> typing.Iterable["moreos.cookie.Cookie"]:
+        """Find the stored cookies that expired before now.
+
+        This doesn't remove anything. The cookies stay stored until they're
+        passed to :meth:`remove`.
+
+        :param now:
+            A timezone-aware datetime to compare the cookies' expiry to.
+        :type now:
+            :class:`~datetime.datetime`
+        """
+        heap = self._expiry_heap
+        expired: typing.Dict[int, "moreos.cookie.Cookie"] = {}
+        # Walk the heap from its root and only descend below entries that
+        # have expired, since their children can't expire any earlier
+        pending = [0]
+        while pending:
+            index = pending.pop()
+            if index >= len(heap) or heap[index][0] >= now:
+                continue
+            cookie = heap[index][2]
+            if self._is_stored(cookie):
+                expired[id(cookie)] = cookie
+            pending.extend((2 * index + 1, 2 * index + 2))
+        return list(expired.values())
 
+    def _is_stored(self: IM, cookie: "moreos.cookie.Cookie") -> bool:
+        # Equal cookies can have different expiries
+        # (Max-Age is relative to when they were received) so this needs to
+        # be the very same cookie and not just an equal one.
+        by_name = self._cookies.get(cookie.domain or "")
+        if by_name is None:
+            return False
+        return any(c is cookie for c in by_name.get(cookie.name, ()))
 
-@attr.s(frozen=True)
+    def _discard_stale_expiries(self: IM) -> None:
+        # Purging removes the earliest expiries first so most of the stale
+        # entries can simply be popped off the top of the heap
+        heap = self._expiry_heap
+        while heap and not self._is_stored(heap[0][2]):
+            heapq.heappop(heap)
+        self._compact_expiry_heap()
+
+    def _compact_expiry_heap(self: IM) -> None:
+        if len(self._expiry_heap) <= 2 * self._expiring + 16:
+            return
+        self._expiry_heap = [
+            entry for entry in self._expiry_heap if self._is_stored(entry[2])
+        ]
+        heapq.heapify(self._expiry_heap)
+
+
+def _as_aware(expiry: datetime.datetime) -> datetime.datetime:
+    """Treat naive datetimes as UTC so all expiries can be compared."""
+    if expiry.tzinfo is None:
+        return expiry.replace(tzinfo=datetime.timezone.utc)
+    return expiry
+
+
+@attr.s(frozen=True, slots=True)
 class Storage:
     """Abstraction for a backend for moreos cookie jar storage."""
 
-    backend: IBackend = attr.ib(validator=attr.validators.provides(IBackend))
+    backend: IBackend = attr.ib()
 
     def purge_expired_cookies(self: S) -> None:
         """Remove expired cookies from storage backend."""
         now = datetime.datetime.now(tz=datetime.timezone.utc)
-        for cookie in self.backend.list():
-            if cookie.expired(now):
-                self.backend.remove(cookie)
+        for cookie in list(self.backend.expired_before(now)):
+            self.backend.remove(cookie)
 
     def find(
         self: S,
         domain: str,
         name: typing.Optional[str] = None,
         path: typing.Optional[str] = None,
-    ) -> typing.Iterable["moreos.cookie.Cookie"]:
+    ) -> typing.List["moreos.cookie.Cookie"]:
         """List cookies stored for a given domain.
 
         :param str domain:
@@ -141,6 +276,7 @@ class Storage:
         :param str path:
             The path associated with the cookie that's been stored.
         :returns:
-            An iterable that contains Cookie instances.
+            A list of the matching Cookie instances, which can be iterated
+            over while changing the backend.
         """
-        return self.backend.list(domain=domain, name=name, path=path)
+        return list(self.backend.list(domain=domain, name=name, path=path))
@@ -0,0 +1,109 @@
+"""Verify the behaviour of our Cookie class and its helpers."""
+import datetime
+
+from moreos import cookie
+
+
+def test_expires_is_parsed_as_an_aware_utc_datetime():
+    """Verify Expires values are converted to timezone-aware datetimes."""
+    c = cookie.Cookie("lang", "", expires="Sun, 06 Nov 1994 08:49:37 GMT")
+    assert c.expires == datetime.datetime(
+        1994, 11, 6, 8, 49, 37, tzinfo=datetime.timezone.utc
+    )
+    assert c.expires.utcoffset() == datetime.timedelta(0)
+
+
+def test_samesite_policy_from_string():
+    """Verify SameSite values are looked up case-insensitively."""
+    assert (
+        cookie.SameSitePolicy.from_string("LAX") is cookie.SameSitePolicy.lax
+    )
+    assert cookie.SameSitePolicy.from_string("from_string") is None
+    assert cookie.SameSitePolicy.from_string(None) is None
+
+
+def test_cookie_type_from_string():
+    """Verify cookie header names are looked up case-insensitively."""
+    assert (
+        cookie.CookieType.from_string("set-cookie")
+        is cookie.CookieType.server
+    )
+    assert cookie.CookieType.from_string("Cookie") is cookie.CookieType.client
+    assert cookie.CookieType.from_string("Set-Cookie2") is None
+
+
+def test_parse_collects_known_attributes():
+    """Verify each known attribute is parsed onto the cookie."""
+    (c,) = cookie.parse(
+        "Set-Cookie",
+        "SID=31d4d96e407aad42; Max-Age=3600; SameSite=Lax; Path=/; Secure",
+    )
+    assert c.max_age == datetime.timedelta(seconds=3600)
+    assert c.samesite is cookie.SameSitePolicy.lax
+    assert c.path == "/"
+    assert c.secure is True
+    assert c.httponly is False
+    assert c.extensions == {}
+
+
+def test_parse_collects_extension_attributes():
+    """Verify attributes we don't recognize are kept as extensions."""
+    (c,) = cookie.parse(
+        "Set-Cookie",
+        "SID=31d4d96e407aad42; Path=/; Priority=High; Partitioned",
+    )
+    assert c.path == "/"
+    assert c.extensions == {"Priority": "High", "Partitioned": ""}
+
+
+def test_parse_ignores_invalid_attribute_values():
+    """Verify known attributes with invalid values are dropped."""
+    (c,) = cookie.parse("Set-Cookie", "SID=31d4d96e407aad42; Max-Age=0")
+    assert c.max_age is None
+    assert c.extensions == {}
+
+
+def test_cookies_with_extensions_are_hashable():
+    """Verify cookies can be stored in sets even with extensions."""
+    (c,) = cookie.parse("Set-Cookie", "SID=31d4d96e407aad42; Priority=High")
+    assert c in {c}
+    assert not hasattr(c, "__dict__")
+
+
+def test_enums_stringify_to_their_values():
+    """Verify our enums convert to the values used in headers."""
+    assert str(cookie.SameSitePolicy.none) == "None"
+    assert str(cookie.CookieType.server) == "Set-Cookie"
+    assert isinstance(cookie.SameSitePolicy.lax, str)
+
+
+def test_domain_lower():
+    """Verify we keep a lower-cased copy of the domain for matching."""
+    assert cookie.Cookie("SID", "", domain="Example.COM").domain_lower == (
+        "example.com"
+    )
+    assert cookie.Cookie("SID", "").domain_lower is None
+
+
+def test_parse_rejects_unicode_whitespace_in_cookie_names():
+    """Verify Unicode whitespace is still a separator in cookie names."""
+    assert cookie.parse("Set-Cookie", "a\xa0b=c") == []
+    assert cookie.parse("Set-Cookie", "a\u3000b=c") == []
+    assert cookie.parse("Set-Cookie", "a\x85b=c") == []
+
+
+def test_parse_keeps_flags_followed_by_a_trailing_semicolon():
+    """Verify a trailing ";" doesn't drop the attributes before it."""
+    (c,) = cookie.parse("Set-Cookie", "a=b; HttpOnly; Secure;")
+    assert c.secure is True
+    assert c.httponly is True
+
+
+def test_parse_splits_attributes_without_spaces():
+    """Verify attributes only separated by ";" are all parsed."""
+    (c,) = cookie.parse("Set-Cookie", "a=b; Secure;HttpOnly")
+    assert c.secure is True
+    assert c.httponly is True
+
+    (c,) = cookie.parse("Set-Cookie", "a=b; Path=/x;y")
+    assert c.path == "/x"
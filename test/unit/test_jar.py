@@ -0,0 +1,17 @@
+"""Verify the behaviour of our cookie Jar."""
+import pytest
+
+from moreos import jar
+from moreos.client_adapters import requests
+
+
+def test_jar_accepts_a_client_adapter():
+    """Verify adapters that provide IRequest are accepted."""
+    adapter = requests.Requests()
+    assert jar.Jar(adapter).client_adapter is adapter
+
+
+def test_jar_rejects_objects_that_are_not_client_adapters():
+    """Verify we catch a misconfigured client adapter early."""
+    with pytest.raises(TypeError):
+        jar.Jar(object())
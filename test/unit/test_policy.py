@@ -0,0 +1,102 @@
+"""Verify the behaviour of our cookie jar policies."""
+import pytest
+
+from moreos import policy
+
+
+@pytest.mark.parametrize(
+    "request_host, expected",
+    [
+        ("example.com", False),
+        ("www.EXAMPLE.com", False),
+        ("notexample.com", True),
+        ("example.org", True),
+    ],
+)
+def test_block_list_rejects_hosts_and_their_subdomains(
+    request_host, expected
+):
+    """Verify hosts on the block list never domain-match."""
+    domain_policy = policy.DomainPolicy(block_list=["example.com"])
+    assert domain_policy.match(request_host, request_host) is expected
+
+
+def test_block_list_ignores_leading_and_trailing_dots():
+    """Verify fully-qualified and dotted entries still block hosts."""
+    domain_policy = policy.DomainPolicy(block_list=["com.", ".example.org"])
+    assert domain_policy.match("a.com", "a.com") is False
+    assert domain_policy.match("www.example.org", "www.example.org") is False
+
+
+@pytest.mark.parametrize(
+    "request_host, expected",
+    [
+        ("example.com", True),
+        ("www.example.com", True),
+        ("example.org", False),
+    ],
+)
+def test_allow_list_only_accepts_listed_hosts(request_host, expected):
+    """Verify only hosts on the allow list may domain-match."""
+    domain_policy = policy.DomainPolicy(allow_list=[".Example.com"])
+    assert domain_policy.match(request_host, request_host) is expected
+
+
+@pytest.mark.parametrize(
+    "host, expected",
+    [
+        ("127.0.0.1", True),
+        ("[::1]", True),
+        ("example.com", False),
+        ("1.2.3", False),
+        ("256.0.0.1", False),
+        ("", False),
+    ],
+)
+def test_is_ipaddress(host, expected):
+    """Verify we identify IP addresses and reject hostnames."""
+    assert policy._is_ipaddress(host) is expected
+
+
+@pytest.mark.parametrize(
+    "domain, expected",
+    [
+        ("com", True),
+        ("co.uk", True),
+        ("github.io", True),
+        ("foo.ck", True),
+        ("www.ck", False),
+        ("example.co.uk", False),
+        ("example.com", False),
+    ],
+)
+def test_is_public_suffix(domain, expected):
+    """Verify we use the Public Suffix List's rules."""
+    assert policy._is_public_suffix(domain) is expected
+
+
+def test_public_suffixes_are_rejected_as_cookie_domains():
+    """Verify a cookie can't be set for every site under a public suffix."""
+    matching = policy.DomainMatching
+    domain_policy = policy.DomainPolicy(
+        matching=matching.reject_wellknown_public_suffixes_as_domain
+    )
+    assert domain_policy.match("www.example.co.uk", ".co.uk") is False
+    assert domain_policy.match("www.example.co.uk", ".example.co.uk") is True
+
+
+@pytest.mark.parametrize(
+    "request_host, cookie_domain, expected",
+    [
+        ("www.example.com", ".example.com", True),
+        ("www.example.com", "example.com", False),
+        ("www.example.com.evil.net", ".example.com", False),
+        ("www.example.org", ".example.com", False),
+    ],
+)
+def test_domain_match_requires_a_dotted_suffix(
+    request_host, cookie_domain, expected
+):
+    """Verify the cookie domain must be a suffix of the request host."""
+    domain_policy = policy.DomainPolicy(matching=policy.DomainMatching(0))
+    assert domain_policy.match(request_host, cookie_domain) is expected
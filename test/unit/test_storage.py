@@ -1,4 +1,5 @@
 """Verify our InMemory and Storage classes."""
+import datetime
 
 from moreos import cookie
 from moreos import storage
@@ -7,10 +8,191 @@ from moreos import storage
 def test_empty_inmemory_backend():
     """Verify some initial behaviours."""
     im = storage.InMemory()
-    assert im.list() == []
+    assert list(im.list()) == []
     im.remove(
         cookie.Cookie(
             "SID", "31d4d96e407aad42", type=cookie.CookieType.server
         )
     )
-    assert im.list() == []
+    assert list(im.list()) == []
+
+
+def test_inmemory_lists_cookies_by_domain():
+    """Verify we can filter stored cookies by domain, name, and path."""
+    sid = cookie.Cookie("SID", "31d4d96e407aad42", domain="example.com")
+    lang = cookie.Cookie("lang", "en-US", domain="example.com", path="/")
+    other = cookie.Cookie("SID", "abcdef", domain="example.org")
+    im = storage.InMemory()
+    im.save([sid, lang, other])
+
+    assert sorted(im.list(), key=repr) == sorted([sid, lang, other], key=repr)
+    assert sorted(im.list(domain="example.com"), key=repr) == sorted(
+        [sid, lang], key=repr
+    )
+    assert list(im.list(domain="example.com", name="SID")) == [sid]
+    assert list(im.list(domain="example.com", path="/")) == [lang]
+    assert list(im.list(domain="example.net")) == []
+
+
+def test_inmemory_drop_for_removes_every_cookie_for_a_domain():
+    """Verify drop_for removes all of a domain's cookies and only those."""
+    sid = cookie.Cookie("SID", "31d4d96e407aad42", domain="example.com")
+    lang = cookie.Cookie("lang", "en-US", domain="example.com")
+    other = cookie.Cookie("SID", "abcdef", domain="example.org")
+    im = storage.InMemory()
+    im.save([sid, lang, other])
+
+    im.drop_for("example.com")
+
+    assert list(im.list()) == [other]
+
+
+def test_purge_expired_cookies_only_removes_expired_cookies():
+    """Verify purging leaves session and unexpired cookies alone."""
+    expired = cookie.Cookie(
+        "SID",
+        "",
+        domain="example.com",
+        expires="Sun, 06 Nov 1994 08:49:37 GMT",
+    )
+    session = cookie.Cookie("lang", "en-US", domain="example.com")
+    unexpired = cookie.Cookie(
+        "theme", "dark", domain="example.com", max_age="3600"
+    )
+    im = storage.InMemory()
+    im.save([expired, session, unexpired])
+
+    storage.Storage(im).purge_expired_cookies()
+
+    assert sorted(im.list(), key=repr) == sorted(
+        [session, unexpired], key=repr
+    )
+
+
+def test_expired_before_skips_removed_cookies():
+    """Verify cookies removed from the backend aren't reported as expired."""
+    expired = cookie.Cookie(
+        "SID",
+        "",
+        domain="example.com",
+        expires="Sun, 06 Nov 1994 08:49:37 GMT",
+    )
+    im = storage.InMemory()
+    im.save([expired])
+    im.remove(expired)
+
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    assert list(im.expired_before(now)) == []
+
+
+def test_purge_keeps_a_fresh_cookie_equal_to_a_removed_expired_one():
+    """Verify a stale expiry entry can't remove an equal, live cookie."""
+    expired = cookie.Cookie("SID", "abc", domain="example.com", max_age="60")
+    # Pretend we received this cookie long enough ago for it to expire
+    object.__setattr__(
+        expired,
+        "_received_at",
+        datetime.datetime.now(tz=datetime.timezone.utc)
+        - datetime.timedelta(minutes=2),
+    )
+    im = storage.InMemory()
+    im.save([expired])
+    im.remove(expired)
+    fresh = cookie.Cookie("SID", "abc", domain="example.com", max_age="60")
+    im.save([fresh])
+
+    storage.Storage(im).purge_expired_cookies()
+
+    stored = list(im.list())
+    assert len(stored) == 1
+    assert stored[0] is fresh
+
+
+def test_save_accepts_naive_and_aware_expires():
+    """Verify saving doesn't need to compare incompatible datetimes."""
+    aware = cookie.Cookie(
+        "SID",
+        "",
+        domain="example.com",
+        expires="Sun, 06 Nov 1994 08:49:37 GMT",
+    )
+    naive = cookie.Cookie(
+        "lang",
+        "",
+        domain="example.com",
+        expires=datetime.datetime(1994, 11, 6),
+    )
+    im = storage.InMemory()
+    im.save([aware, naive])
+
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    assert sorted(im.expired_before(now), key=repr) == sorted(
+        [aware, naive], key=repr
+    )
+
+
+def test_removed_cookies_are_pruned_from_the_expiry_index():
+    """Verify removed cookies aren't kept alive by the expiry index."""
+    cookies = [
+        cookie.Cookie(f"c{i}", "", domain="example.com", max_age="3600")
+        for i in range(100)
+    ]
+    im = storage.InMemory()
+    im.save(cookies)
+    for c in cookies[:90]:
+        im.remove(c)
+
+    # Stale entries are compacted once they outnumber the stored cookies, so
+    # only a bounded number of them may remain
+    assert len(im._expiry_heap) <= 2 * 10 + 16
+
+
+def test_remove_prunes_empty_buckets():
+    """Verify removing the last cookie for a domain forgets the domain."""
+    cookies = [
+        cookie.Cookie("SID", "", domain=f"example{i}.com") for i in range(10)
+    ]
+    im = storage.InMemory()
+    im.save(cookies)
+    for c in cookies:
+        im.remove(c)
+
+    assert len(im._cookies) == 0
+    assert list(im.list()) == []
+
+
+def test_expired_before_does_not_remove_cookies():
+    """Verify looking up expired cookies leaves them to be purged."""
+    expired = cookie.Cookie(
+        "SID",
+        "",
+        domain="example.com",
+        expires="Sun, 06 Nov 1994 08:49:37 GMT",
+    )
+    im = storage.InMemory()
+    im.save([expired])
+
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    assert list(im.expired_before(now)) == [expired]
+    assert list(im.expired_before(now)) == [expired]
+
+    storage.Storage(im).purge_expired_cookies()
+
+    assert list(im.list()) == []
+    assert list(im.expired_before(now)) == []
+    assert im._expiry_heap == []
+
+
+def test_found_cookies_can_be_removed_while_iterating():
+    """Verify Storage.find doesn't return a view of the backend."""
+    cookies = [
+        cookie.Cookie(f"c{i}", "", domain="example.com") for i in range(10)
+    ]
+    im = storage.InMemory()
+    im.save(cookies)
+    store = storage.Storage(im)
+
+    for c in store.find(domain="example.com"):
+        store.backend.remove(c)
+
+    assert list(im.list()) == []